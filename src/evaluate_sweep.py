@@ -0,0 +1,324 @@
+import os
+import csv
+import time
+import shutil
+import hashlib
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+VAL_IMAGES = "../Dataset_Final/images/val"
+VAL_LABELS = "../Dataset_Final/labels/val"
+CACHE_DIR = "../output/sweep_cache"   # Raw predictions per configuration (delete to force a re-run)
+RESULTS_CSV = "../output/sweep_results.csv"
+
+# Candidate configurations: model file x image size x backend
+MODELS = ['../models/yolo11_small.pt']
+IMG_SIZES = [256, 320, 416, 640]
+BACKENDS = ['pt', 'onnx']             # Anything model.export() understands: 'pt', 'onnx', 'openvino', ...
+
+PRED_CONF = 0.001       # Cache (almost) everything, thresholds are applied when scoring
+CONF_THRESHOLDS = [0.1, 0.25, 0.4]    # Re-scored from cache, no inference needed
+SKIP_INTERVALS = [0, 1, 2]            # Dashboard frame skipping, reported as effective FPS
+ACCURACY_FLOOR = 0.50   # Minimum mAP@0.5 a configuration must reach to be picked
+WARMUP_IMAGES = 3       # Not timed (first calls allocate / compile)
+
+# YOUR EXACT 11 CLASSES
+CLASS_NAMES = [
+    "Auto Rickshaw",      # 0
+    "Cycle Rickshaw",     # 1
+    "CNG / Tempo",        # 2
+    "Bus",                # 3
+    "Jeep / SUV",         # 4
+    "Microbus",           # 5
+    "Minibus",            # 6
+    "Motorcycle",         # 7
+    "Truck",              # 8
+    "Private Sedan Car",  # 9
+    "Trailer"             # 10
+]
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+# --- DATA ---
+def list_val_images():
+    return sorted(f for f in os.listdir(VAL_IMAGES) if f.lower().endswith(('.jpg', '.png', '.jpeg')))
+
+
+def load_labels(images):
+    """Ground truth per image as rows of [cls, x1, y1, x2, y2] (normalised)."""
+    labels = []
+    for img_file in images:
+        path = os.path.join(VAL_LABELS, os.path.splitext(img_file)[0] + ".txt")
+        rows = []
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    parts = line.strip().split()
+                    if len(parts) < 5:
+                        continue
+                    cls, xc, yc, w, h = int(parts[0]), *map(float, parts[1:5])
+                    rows.append([cls, xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2])
+        labels.append(np.array(rows, dtype=np.float32).reshape(-1, 5))
+    return labels
+
+
+# --- PREDICTION (cached) ---
+def config_key(model_path, imgsz, backend, images):
+    # Model file identity + settings + every val image's name, size and mtime, so a
+    # re-captured image that keeps its name (final_prepare.py splits by name) still
+    # invalidates the cache
+    stat = os.stat(model_path)
+    image_ids = []
+    for img_file in images:
+        img_stat = os.stat(os.path.join(VAL_IMAGES, img_file))
+        image_ids.append(f"{img_file}:{img_stat.st_size}:{img_stat.st_mtime}")
+    raw = f"{os.path.abspath(model_path)}|{stat.st_size}|{stat.st_mtime}|{imgsz}|{backend}|{PRED_CONF}|{'|'.join(image_ids)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def load_backend(model_path, imgsz, backend):
+    from ultralytics import YOLO
+
+    if backend == 'pt':
+        return YOLO(model_path)
+
+    # export() writes next to the weights, which would overwrite a deployed
+    # .onnx in ../models. Export from a private copy, one folder per config.
+    export_dir = os.path.join(CACHE_DIR, "exports", f"{os.path.splitext(os.path.basename(model_path))[0]}_{backend}_{imgsz}")
+    os.makedirs(export_dir, exist_ok=True)
+    weights_copy = os.path.join(export_dir, os.path.basename(model_path))
+    shutil.copy2(model_path, weights_copy)
+
+    print(f"  Exporting {os.path.basename(model_path)} to {backend} @ {imgsz}...")
+    exported = YOLO(weights_copy).export(format=backend, imgsz=imgsz, verbose=False)
+    return YOLO(exported, task='detect')
+
+
+def run_predictions(model_path, imgsz, backend, images):
+    """
+    Returns (preds, latencies_ms). preds[i] is an array of
+    [cls, conf, x1, y1, x2, y2] (normalised) for images[i].
+    """
+    key = config_key(model_path, imgsz, backend, images)
+    cache_path = os.path.join(CACHE_DIR, f"{key}.npz")
+    if os.path.exists(cache_path):
+        # Pull each array out once, NpzFile decompresses on every access
+        with np.load(cache_path) as data:
+            boxes, image_idx, latency_ms = data["boxes"], data["image_idx"], data["latency_ms"]
+        preds = [boxes[image_idx == i] for i in range(len(images))]
+        return preds, latency_ms
+
+    model = load_backend(model_path, imgsz, backend)
+    preds, latencies = [], []
+    for i, img_file in enumerate(images):
+        # Decode outside the timed block: the dashboard gets frames already decoded
+        img = cv2.imread(os.path.join(VAL_IMAGES, img_file))
+        t0 = time.perf_counter()
+        results = model.predict(img, conf=PRED_CONF, imgsz=imgsz, device='cpu', verbose=False)
+        elapsed = (time.perf_counter() - t0) * 1000
+
+        if i >= WARMUP_IMAGES or len(images) <= WARMUP_IMAGES:
+            latencies.append(elapsed)
+
+        boxes = results[0].boxes
+        rows = np.concatenate([
+            boxes.cls.cpu().numpy()[:, None],
+            boxes.conf.cpu().numpy()[:, None],
+            boxes.xyxyn.cpu().numpy(),
+        ], axis=1) if len(boxes) else np.zeros((0, 6), dtype=np.float32)
+        preds.append(rows.astype(np.float32))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez_compressed(
+        cache_path,
+        boxes=np.concatenate(preds) if preds else np.zeros((0, 6), dtype=np.float32),
+        image_idx=np.concatenate([np.full(len(p), i) for i, p in enumerate(preds)]) if preds else np.zeros(0),
+        latency_ms=np.array(latencies, dtype=np.float32),
+    )
+    return preds, np.array(latencies, dtype=np.float32)
+
+
+# --- SCORING ---
+def box_iou_matrix(a, b):
+    """IoU between every box in a (N,4) and b (M,4), both xyxy."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_image(pred, gt):
+    """
+    Greedy matching (highest confidence first, same class only).
+    Returns a (num_preds, num_iou_thresholds) bool array of true positives.
+    """
+    tp = np.zeros((len(pred), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(pred) == 0 or len(gt) == 0:
+        return tp
+
+    order = np.argsort(-pred[:, 1])
+    ious = box_iou_matrix(pred[:, 2:6], gt[:, 1:5])
+    ious[pred[:, 0][:, None] != gt[:, 0][None, :]] = 0
+
+    for t, thr in enumerate(IOU_THRESHOLDS):
+        taken = np.zeros(len(gt), dtype=bool)
+        for p in order:
+            candidates = np.where((ious[p] >= thr) & ~taken)[0]
+            if len(candidates):
+                best = candidates[np.argmax(ious[p, candidates])]
+                taken[best] = True
+                tp[p, t] = True
+    return tp
+
+
+def average_precision(tp, conf, num_gt):
+    """COCO-style 101-point interpolated AP for one class and one IoU threshold."""
+    if num_gt == 0 or len(tp) == 0:
+        return 0.0
+    order = np.argsort(-conf)
+    tp = tp[order]
+    tp_cum = np.cumsum(tp)
+    fp_cum = np.cumsum(~tp)
+    recall = tp_cum / num_gt
+    precision = tp_cum / (tp_cum + fp_cum)
+
+    # Precision envelope, then sample it at 101 recall points the way pycocotools does
+    # (recall levels never reached count as 0)
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision)))
+    idx = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    sampled = np.zeros(101)
+    reached = idx < len(recall)
+    sampled[reached] = envelope[idx[reached]]
+    return float(np.mean(sampled))
+
+
+def score(preds, labels, conf_threshold):
+    """Per-class AP@0.5 and AP@0.5:0.95 for predictions above conf_threshold."""
+    all_tp, all_conf, all_cls = [], [], []
+    for pred, gt in zip(preds, labels):
+        pred = pred[pred[:, 1] >= conf_threshold]
+        all_tp.append(match_image(pred, gt))
+        all_conf.append(pred[:, 1])
+        all_cls.append(pred[:, 0])
+
+    tp = np.concatenate(all_tp)
+    conf = np.concatenate(all_conf)
+    cls = np.concatenate(all_cls).astype(int)
+    gt_cls = np.concatenate([gt[:, 0] for gt in labels]).astype(int)
+
+    per_class = {}
+    for c, name in enumerate(CLASS_NAMES):
+        num_gt = int(np.sum(gt_cls == c))
+        if num_gt == 0:
+            continue # Not in the val set, leave it out of the mean
+        mask = cls == c
+        aps = [average_precision(tp[mask, t], conf[mask], num_gt) for t in range(len(IOU_THRESHOLDS))]
+        per_class[name] = (aps[0], float(np.mean(aps)))
+    return per_class
+
+
+# --- REPORT ---
+def pareto_front(rows):
+    """Rows nobody beats on both latency and mAP@0.5."""
+    front = []
+    for row in rows:
+        dominated = any(
+            other["latency_ms"] <= row["latency_ms"] and other["map50"] >= row["map50"]
+            and (other["latency_ms"] < row["latency_ms"] or other["map50"] > row["map50"])
+            for other in rows
+        )
+        if not dominated:
+            front.append(row)
+    return front
+
+
+def run_sweep():
+    images = list_val_images()
+    if not images:
+        print(f"❌ ERROR: No images found in {VAL_IMAGES}")
+        return
+    labels = load_labels(images)
+    print(f"Evaluating on {len(images)} val images, {sum(len(l) for l in labels)} boxes.")
+
+    rows = []
+    for model_path in MODELS:
+        if not os.path.exists(model_path):
+            print(f"  [SKIP] Model not found: {model_path}")
+            continue
+        for backend in BACKENDS:
+            for imgsz in IMG_SIZES:
+                name = f"{os.path.basename(model_path)} | {backend} | {imgsz}"
+                print(f"Config: {name}")
+                try:
+                    preds, latencies = run_predictions(model_path, imgsz, backend, images)
+                except Exception as e:
+                    print(f"  [SKIP] {name}: {e}")
+                    continue
+
+                latency = float(np.median(latencies)) if len(latencies) else float("nan")
+                for conf in CONF_THRESHOLDS:
+                    per_class = score(preds, labels, conf)
+                    rows.append({
+                        "model": os.path.basename(model_path),
+                        "backend": backend,
+                        "imgsz": imgsz,
+                        "conf": conf,
+                        "latency_ms": latency,
+                        "latency_p90_ms": float(np.percentile(latencies, 90)) if len(latencies) else float("nan"),
+                        "map50": float(np.mean([v[0] for v in per_class.values()])) if per_class else 0.0,
+                        "map50_95": float(np.mean([v[1] for v in per_class.values()])) if per_class else 0.0,
+                        "per_class": per_class,
+                    })
+
+    if not rows:
+        print("❌ No configuration could be evaluated.")
+        return
+
+    rows.sort(key=lambda r: r["latency_ms"])
+    front = {id(r) for r in pareto_front(rows)}
+
+    # --- PARETO TABLE ---
+    fps_headers = "".join(f" FPS@skip{s:<2}" for s in SKIP_INTERVALS)
+    print("-" * 100)
+    print(f"{'':2}{'model':<22}{'backend':<9}{'imgsz':>6}{'conf':>6}{'ms':>8}{'p90':>8}{'mAP50':>8}{'mAP50-95':>10}{fps_headers}")
+    for row in rows:
+        # Frame skipping runs the model on 1 of (skip + 1) frames
+        fps = "".join(f"{1000 * (s + 1) / row['latency_ms']:>11.1f}" for s in SKIP_INTERVALS)
+        mark = "* " if id(row) in front else "  "
+        print(f"{mark}{row['model']:<22}{row['backend']:<9}{row['imgsz']:>6}{row['conf']:>6}"
+              f"{row['latency_ms']:>8.1f}{row['latency_p90_ms']:>8.1f}{row['map50']:>8.3f}{row['map50_95']:>10.3f}{fps}")
+    print("(* = Pareto optimal: nothing else is both faster and more accurate)")
+
+    # --- PICK ---
+    eligible = [r for r in rows if r["map50"] >= ACCURACY_FLOOR]
+    print("-" * 100)
+    if eligible:
+        best = eligible[0]
+        print(f"✅ Fastest config with mAP@0.5 >= {ACCURACY_FLOOR}: "
+              f"{best['model']} | {best['backend']} | imgsz={best['imgsz']} | conf={best['conf']} "
+              f"({best['latency_ms']:.1f} ms, mAP@0.5 {best['map50']:.3f})")
+        for name, (ap50, ap50_95) in best["per_class"].items():
+            print(f"    {name:<20} AP50 {ap50:.3f}   AP50-95 {ap50_95:.3f}")
+    else:
+        print(f"⚠️ No configuration reaches mAP@0.5 >= {ACCURACY_FLOOR}")
+
+    # --- CSV (one row per config, per-class AP50 columns) ---
+    os.makedirs(os.path.dirname(RESULTS_CSV), exist_ok=True)
+    with open(RESULTS_CSV, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["model", "backend", "imgsz", "conf", "latency_ms", "latency_p90_ms", "map50", "map50_95", "pareto"]
+                        + [f"AP50 {name}" for name in CLASS_NAMES])
+        for row in rows:
+            writer.writerow([row["model"], row["backend"], row["imgsz"], row["conf"],
+                             f"{row['latency_ms']:.2f}", f"{row['latency_p90_ms']:.2f}",
+                             f"{row['map50']:.4f}", f"{row['map50_95']:.4f}", id(row) in front]
+                            + [f"{row['per_class'][n][0]:.4f}" if n in row["per_class"] else "" for n in CLASS_NAMES])
+    print(f"Results saved to {RESULTS_CSV}")
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -1,6 +1,6 @@
 import os
 import shutil
-import random
+import hashlib
 
 # --- CONFIGURATION ---
 # Input (Where your stuff is now)
@@ -9,6 +9,13 @@ SRC_LBL = "../Dataset/labels"
 
 # Output (Where we will build the clean YOLO dataset)
 DST_DIR = "../Dataset_Final"
+VAL_PERCENT = 20 # Share of pairs that go to VAL
+
+def split_for(name):
+    # Decided by the file name, not a shuffle, so every rebuild puts a pair
+    # in the same split (incremental_train.py relies on this)
+    bucket = int(hashlib.md5(name.encode("utf-8")).hexdigest(), 16) % 100
+    return 'val' if bucket < VAL_PERCENT else 'train'
 
 def prepare_dataset():
     # 1. Create structure: images/train, images/val, labels/train, labels/val
@@ -32,21 +39,25 @@ def prepare_dataset():
         else:
             print(f"  [SKIP] Missing label for: {img_file}")
 
-    # 3. Shuffle and Split (80% Train, 20% Val)
-    random.shuffle(valid_pairs)
-    split_idx = int(len(valid_pairs) * 0.8)
-    train_set = valid_pairs[:split_idx]
-    val_set = valid_pairs[split_idx:]
+    # 3. Split (80% Train, 20% Val), stable across rebuilds
+    train_set = [p for p in valid_pairs if split_for(os.path.splitext(p[0])[0]) == 'train']
+    val_set = [p for p in valid_pairs if split_for(os.path.splitext(p[0])[0]) == 'val']
 
     print(f"Moving {len(train_set)} items to TRAIN and {len(val_set)} to VAL...")
 
-    # 4. Copy files
+    # 4. Copy files (copy2 keeps mtimes, so incremental_train.py can skip unchanged pairs)
     def copy_files(file_list, split_name):
         for img, lbl in file_list:
             # Copy Image
-            shutil.copy(os.path.join(SRC_IMG, img), os.path.join(DST_DIR, 'images', split_name, img))
+            shutil.copy2(os.path.join(SRC_IMG, img), os.path.join(DST_DIR, 'images', split_name, img))
             # Copy Label
-            shutil.copy(os.path.join(SRC_LBL, lbl), os.path.join(DST_DIR, 'labels', split_name, lbl))
+            shutil.copy2(os.path.join(SRC_LBL, lbl), os.path.join(DST_DIR, 'labels', split_name, lbl))
+
+            # Remove a stale copy left in the other split by an older build (train/val overlap)
+            other = 'val' if split_name == 'train' else 'train'
+            for stale in [os.path.join(DST_DIR, 'images', other, img), os.path.join(DST_DIR, 'labels', other, lbl)]:
+                if os.path.exists(stale):
+                    os.remove(stale)
 
     copy_files(train_set, 'train')
     copy_files(val_set, 'val')
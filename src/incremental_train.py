@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import random
+import shutil
+import hashlib
+import cv2
+
+# --- CONFIGURATION ---
+DATASET_DIR = "../Dataset_Final"
+DEFAULT_MODEL = '../models/yolo11_small.pt'    # Fine-tuned from, and replaced with the new weights
+MANIFEST_FILE = '../models/train_manifest.json' # What DEFAULT_MODEL has already been trained on
+WORK_DIR = '../runs/incremental'
+
+REPLAY_RATIO = 1.0      # Old samples replayed per new sample (stops the model forgetting)
+REPLAY_PER_CLASS = 5    # Make sure every class the old data has gets at least this many replays
+FINETUNE_EPOCHS = 15
+FINETUNE_LR = 0.001     # Lower than a from-scratch run, we only nudge the weights
+IMG_SIZE = 320          # Same as the dashboard
+SEED = 0
+
+# YOUR EXACT 11 CLASSES
+CLASS_NAMES = [
+    "Auto Rickshaw",      # 0
+    "Cycle Rickshaw",     # 1
+    "CNG / Tempo",        # 2
+    "Bus",                # 3
+    "Jeep / SUV",         # 4
+    "Microbus",           # 5
+    "Minibus",            # 6
+    "Motorcycle",         # 7
+    "Truck",              # 8
+    "Private Sedan Car",  # 9
+    "Trailer"             # 10
+]
+
+
+# --- MANIFEST ---
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE):
+        return None
+    with open(MANIFEST_FILE, 'r') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    tmp_path = MANIFEST_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def validate_pair(img_path, lbl_path):
+    """Returns (class_ids, None) for a usable pair or (None, reason)."""
+    if cv2.imread(img_path) is None:
+        return None, "unreadable image"
+
+    classes = set()
+    with open(lbl_path, 'r') as f:
+        for line in f:
+            parts = line.strip().split()
+            if not parts:
+                continue
+            if len(parts) < 5:
+                return None, f"bad line '{line.strip()}'"
+            try:
+                class_id = int(parts[0])
+                coords = [float(v) for v in parts[1:5]]
+            except ValueError:
+                return None, f"bad line '{line.strip()}'"
+            if not 0 <= class_id < len(CLASS_NAMES):
+                return None, f"invalid Class ID {class_id}"
+            if any(not 0.0 <= v <= 1.0 for v in coords):
+                return None, "box outside the image"
+            classes.add(class_id)
+    return sorted(classes), None
+
+
+def scan_dataset(manifest_entries):
+    """
+    Compares train + val against the manifest. Entries are keyed by file
+    stem, so a pair that only moved between splits keeps its history.
+    Unchanged files (same split, size and mtime) are trusted as-is. Anything
+    else is hashed, and only pairs whose content really changed get validated.
+    Rejected pairs are recorded too, so they are not re-validated either.
+    Returns (entries, changed_stems, rejected, moved_to_val).
+    """
+    entries, changed, rejected, moved_to_val = {}, [], [], []
+    for split in ['train', 'val']:
+        img_dir = os.path.join(DATASET_DIR, "images", split)
+        lbl_dir = os.path.join(DATASET_DIR, "labels", split)
+        if not os.path.isdir(img_dir):
+            continue
+
+        for img_file in sorted(os.listdir(img_dir)):
+            if not img_file.lower().endswith(('.jpg', '.png', '.jpeg')):
+                continue
+            stem = os.path.splitext(img_file)[0]
+            img_path = os.path.join(img_dir, img_file)
+            lbl_path = os.path.join(lbl_dir, stem + ".txt")
+            if not os.path.exists(lbl_path):
+                continue
+            if stem in entries:
+                rejected.append((f"{split}/{img_file}", f"also in {entries[stem]['split']}"))
+                continue
+
+            img_stat, lbl_stat = os.stat(img_path), os.stat(lbl_path)
+            stamp = [img_stat.st_size, img_stat.st_mtime, lbl_stat.st_size, lbl_stat.st_mtime]
+            old = manifest_entries.get(stem)
+            location = {"split": split, "file": img_file, "stamp": stamp}
+
+            # 1. Fast path: nothing touched the files
+            if old and old["split"] == split and old["file"] == img_file and old["stamp"] == stamp:
+                entries[stem] = old
+                if old.get("rejected"):
+                    rejected.append((f"{split}/{img_file}", old["rejected"]))
+                continue
+
+            # 2. Touched or moved (e.g. final_prepare.py re-copied them), but is the content different?
+            img_hash, lbl_hash = file_sha1(img_path), file_sha1(lbl_path)
+            if old and old["image_sha1"] == img_hash and old["label_sha1"] == lbl_hash:
+                entries[stem] = dict(old, **location)
+                if old.get("rejected"):
+                    rejected.append((f"{split}/{img_file}", old["rejected"]))
+                elif old["split"] == "val" and split == "train":
+                    # Already validated, but the model has never trained on a val pair
+                    changed.append(stem)
+                elif old["split"] == "train" and split == "val":
+                    moved_to_val.append(stem)
+                continue
+
+            # 3. New or changed: validate before it goes anywhere near training
+            hashes = {"image_sha1": img_hash, "label_sha1": lbl_hash}
+            classes, reason = validate_pair(img_path, lbl_path)
+            if classes is None:
+                entries[stem] = dict(location, rejected=reason, **hashes)
+                rejected.append((f"{split}/{img_file}", reason))
+                continue
+            entries[stem] = dict(location, classes=classes, **hashes)
+            changed.append(stem)
+    return entries, changed, rejected, moved_to_val
+
+
+def candidate_signature(stems, entries):
+    # Identifies one fine-tune mix by the content of its new pairs
+    items = sorted([stem, entries[stem]["image_sha1"], entries[stem]["label_sha1"]] for stem in stems)
+    return hashlib.sha1(json.dumps(items).encode("utf-8")).hexdigest()
+
+
+# --- REPLAY MIX ---
+def pick_replay(old_keys, entries, num_new):
+    """
+    Random old samples to mix in with the new ones: first a few per class
+    (so rare classes are not forgotten), then topped up at random.
+    """
+    rng = random.Random(SEED)
+    target = min(len(old_keys), max(int(num_new * REPLAY_RATIO), 1))
+
+    chosen = set()
+    for class_id in range(len(CLASS_NAMES)):
+        with_class = [k for k in old_keys if class_id in entries[k]["classes"]]
+        rng.shuffle(with_class)
+        chosen.update(with_class[:REPLAY_PER_CLASS])
+
+    remaining = [k for k in old_keys if k not in chosen]
+    rng.shuffle(remaining)
+    chosen.update(remaining[:max(0, target - len(chosen))])
+    return sorted(chosen)
+
+
+def write_data_yaml(train_keys, entries):
+    os.makedirs(WORK_DIR, exist_ok=True)
+    list_path = os.path.abspath(os.path.join(WORK_DIR, "train.txt"))
+    with open(list_path, 'w') as f:
+        for key in train_keys:
+            entry = entries[key]
+            f.write(os.path.abspath(os.path.join(DATASET_DIR, "images", entry["split"], entry["file"])) + "\n")
+
+    yaml_path = os.path.join(WORK_DIR, "data.yaml")
+    with open(yaml_path, 'w') as f:
+        f.write(f"path: {os.path.abspath(DATASET_DIR)}\n")
+        f.write(f"train: {list_path}\n")
+        f.write("val: images/val\n\n")
+        f.write("names:\n")
+        for i, name in enumerate(CLASS_NAMES):
+            f.write(f"  {i}: {name}\n")
+    return yaml_path
+
+
+def evaluate_weights(weights, data_yaml):
+    from ultralytics import YOLO
+    metrics = YOLO(weights).val(data=data_yaml, split='val', imgsz=IMG_SIZE, device='cpu', plots=False, verbose=False)
+    return float(metrics.box.map50)
+
+
+# --- PIPELINE ---
+def incremental_train():
+    manifest = load_manifest()
+    model_sha1 = file_sha1(DEFAULT_MODEL) if os.path.exists(DEFAULT_MODEL) else None
+    if manifest and manifest.get("model_sha1") != model_sha1:
+        # DEFAULT_MODEL was replaced outside this script (e.g. a full retrain),
+        # so the manifest no longer describes what it was trained on
+        print(f"⚠️ {DEFAULT_MODEL} does not match the manifest, re-recording the baseline.")
+        manifest = None
+    old_entries = manifest["entries"] if manifest else {}
+
+    print(f"Scanning {os.path.abspath(DATASET_DIR)} against {MANIFEST_FILE}...")
+    entries, changed, rejected, moved_to_val = scan_dataset(old_entries)
+
+    for key, reason in rejected:
+        print(f"  [SKIP] {key}: {reason}")
+    if moved_to_val:
+        # Already trained on, so they make val look better for the current weights
+        print(f"  ⚠️ {len(moved_to_val)} trained pairs moved train -> val: {', '.join(moved_to_val[:10])}")
+
+    if manifest is None:
+        # First run: assume DEFAULT_MODEL was trained on what is there now
+        save_manifest({"entries": entries, "model_sha1": model_sha1, "last_trained": None})
+        print(f"Baseline recorded for {sum(not e.get('rejected') for e in entries.values())} pairs, run again after adding new labels.")
+        return
+
+    new_train = [k for k in changed if entries[k]["split"] == "train"]
+    usable = [k for k in entries if not entries[k].get("rejected")]
+    print(f"{len(usable)} pairs, {len(changed)} new/changed ({len(new_train)} in train), {len(rejected)} rejected.")
+    if not new_train:
+        # Val-only changes just need recording, nothing to fine-tune on
+        save_manifest(dict(manifest, entries=entries))
+        print("Nothing new to train on. Model left as-is.")
+        return
+
+    # Same new data as a fine-tune that already lost to the current weights: don't burn hours repeating it
+    signature = candidate_signature(new_train, entries)
+    last_rejected = manifest.get("rejected_candidate")
+    if last_rejected and last_rejected["signature"] == signature:
+        print(f"Skipping: this exact set of new pairs was already fine-tuned and rejected "
+              f"(val mAP@0.5 {last_rejected['new_map']:.4f} < {last_rejected['old_map']:.4f}). "
+              f"Label more data or change the settings, then delete 'rejected_candidate' from {MANIFEST_FILE}.")
+        return
+
+    old_train = [k for k in usable if entries[k]["split"] == "train" and k not in new_train]
+    replay = pick_replay(old_train, entries, len(new_train))
+    print(f"Fine-tuning on {len(new_train)} new + {len(replay)} replayed samples...")
+    data_yaml = write_data_yaml(new_train + replay, entries)
+
+    from ultralytics import YOLO
+    model = YOLO(DEFAULT_MODEL)
+    model.train(
+        data=data_yaml,
+        epochs=FINETUNE_EPOCHS,
+        imgsz=IMG_SIZE,
+        optimizer='AdamW', # 'auto' ignores lr0 and picks its own learning rate
+        lr0=FINETUNE_LR,
+        warmup_epochs=0,
+        device='cpu',
+        project=os.path.abspath(WORK_DIR),
+        name="run",
+        exist_ok=True,
+        seed=SEED,
+        verbose=False,
+    )
+
+    best = str(model.trainer.best)
+    if not os.path.exists(best):
+        print(f"❌ ERROR: Training finished but {best} was not found. Model left as-is.")
+        return
+
+    # Only swap if the fine-tune is at least as good on the (unchanged) val split
+    old_map = evaluate_weights(DEFAULT_MODEL, data_yaml)
+    new_map = evaluate_weights(best, data_yaml)
+    print(f"Val mAP@0.5: current {old_map:.4f} -> fine-tuned {new_map:.4f}")
+    if new_map < old_map:
+        # Record everything except the new pairs (so they stay "new"), plus why we gave up on this mix
+        kept = {k: v for k, v in entries.items() if k not in new_train}
+        kept.update({k: old_entries[k] for k in new_train if k in old_entries})
+        save_manifest(dict(manifest, entries=kept, rejected_candidate={
+            "signature": signature, "old_map": old_map, "new_map": new_map, "time": time.time()}))
+        print(f"⚠️ Fine-tuned weights are worse, {DEFAULT_MODEL} left as-is (candidate kept at {best}).")
+        print("   The same set of new pairs will not be retrained until the data changes.")
+        return
+
+    # Keep the previous weights next to the new ones in case the fine-tune made things worse
+    root, ext = os.path.splitext(DEFAULT_MODEL)
+    shutil.copy2(DEFAULT_MODEL, f"{root}_prev{ext}")
+    shutil.copy2(best, DEFAULT_MODEL)
+
+    # Only now is the new data really "trained on"
+    save_manifest({"entries": entries, "model_sha1": file_sha1(DEFAULT_MODEL), "last_trained": time.time()})
+    print(f"SUCCESS! New weights are in {DEFAULT_MODEL} (previous kept as {root}_prev{ext})")
+
+
+if __name__ == "__main__":
+    incremental_train()
@@ -0,0 +1,138 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# NOTE: tracker state needs no pruning here. model.track(persist=True) only keeps
+# active/lost tracks (lost ones expire after track_buffer frames) and ultralytics
+# already caps removed_stracks at 1000. soak_test.py is the check that this holds.
+
+# --- CONFIGURATION ---
+SEGMENT_MAX_SECONDS = 3600      # Start a new output file every hour...
+SEGMENT_MAX_BYTES = 2 * 1024**3 # ...or once the current one passes 2 GB
+SIZE_CHECK_INTERVAL = 250       # Frames between file size checks (stat() is not free)
+
+# One BGR colour per class ID, so boxes look the same every run
+CLASS_COLORS = [
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207), (10, 249, 72),
+    (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0), (168, 153, 44),
+]
+
+
+class BufferPool:
+    """
+    Hands out preallocated numpy arrays by name. A buffer is only
+    reallocated when the requested shape changes (e.g. a new video).
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+
+    def clear(self):
+        self._buffers.clear()
+
+
+def annotate_into(dst, frame, result, class_names):
+    """
+    Draws tracked boxes from an ultralytics result onto `dst` (a pooled
+    buffer the same shape as `frame`), instead of allocating a new image
+    like results[0].plot() does.
+    """
+    np.copyto(dst, frame)
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return dst
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    classes = boxes.cls.cpu().numpy()
+    ids = boxes.id.cpu().numpy() if boxes.id is not None else None
+    return draw_tracks(dst, xyxy, classes, ids, class_names)
+
+
+def draw_tracks(dst, xyxy, classes, ids, class_names):
+    """Draws boxes in place. `ids` may be None for untracked detections."""
+    xyxy = np.asarray(xyxy).astype(int)
+    classes = np.asarray(classes).astype(int)
+    if ids is not None:
+        ids = np.asarray(ids).astype(int)
+
+    for i, (x1, y1, x2, y2) in enumerate(xyxy):
+        cls = classes[i]
+        color = CLASS_COLORS[cls % len(CLASS_COLORS)]
+        name = class_names[cls] if 0 <= cls < len(class_names) else str(cls)
+        label = f"id:{ids[i]} {name}" if ids is not None else name
+
+        cv2.rectangle(dst, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(dst, label, (x1, max(y1 - 5, 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+    return dst
+
+
+class SegmentedVideoWriter:
+    """
+    Drop-in replacement for cv2.VideoWriter that rotates to a new file
+    (processed_video_0001.mp4, _0002, ...) on a time or size limit.
+    """
+
+    def __init__(self, base_path, fourcc, fps, size, max_seconds=SEGMENT_MAX_SECONDS, max_bytes=SEGMENT_MAX_BYTES):
+        self.base_path = base_path
+        self.fourcc = fourcc
+        self.fps = fps
+        self.size = size
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+
+        self.segment_index = 0
+        self.writer = None
+        self.current_path = None
+        self.segment_start = 0
+        self.frames_in_segment = 0
+        self._open_next()
+
+    def _open_next(self):
+        if self.writer:
+            self.writer.release()
+        self.segment_index += 1
+        root, ext = os.path.splitext(self.base_path)
+        self.current_path = f"{root}_{self.segment_index:04d}{ext}"
+        self.writer = cv2.VideoWriter(self.current_path, self.fourcc, self.fps, self.size)
+        self.segment_start = time.time()
+        self.frames_in_segment = 0
+        print(f"📼 Writing segment: {self.current_path}")
+
+    def _should_rotate(self):
+        if self.max_seconds and time.time() - self.segment_start >= self.max_seconds:
+            return True
+        if self.max_bytes and self.frames_in_segment % SIZE_CHECK_INTERVAL == 0:
+            try:
+                return os.path.getsize(self.current_path) >= self.max_bytes
+            except OSError:
+                return False
+        return False
+
+    def write(self, frame):
+        if self.frames_in_segment > 0 and self._should_rotate():
+            self._open_next()
+        self.writer.write(frame)
+        self.frames_in_segment += 1
+
+    def describe(self):
+        # For the "Saved to" message: every segment written so far
+        root, ext = os.path.splitext(self.base_path)
+        if self.segment_index <= 1:
+            return self.current_path
+        return f"{root}_0001{ext} ... {os.path.basename(self.current_path)} ({self.segment_index} segments)"
+
+    def isOpened(self):
+        return self.writer is not None and self.writer.isOpened()
+
+    def release(self):
+        if self.writer:
+            self.writer.release()
+            self.writer = None
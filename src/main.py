@@ -1,19 +1,23 @@
+import time
+PROCESS_START = time.perf_counter() # Reference point for startup timings
+
 import sys
 import cv2
-import time
-import psutil
-import torch
 import numpy as np
-import pynvml
 from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QFileDialog
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap
-from ultralytics import YOLO
+from telemetry import TelemetrySampler
+from longrun import BufferPool, SegmentedVideoWriter, annotate_into
+# NOTE: torch / ultralytics are imported inside ModelLoader, not here.
+# They take seconds to import and would keep the window from showing.
 
 # --- CONFIGURATION ---
 DEFAULT_MODEL = '../models/yolo11_small.pt' # Use .pt for best GPU support
 DEFAULT_VIDEO = '../inference/Video/Inference -1.mp4'
 OUTPUT_FILE = '../output/processed_video.mp4' # Fixed: Changed to .mp4 for stability
+LONG_RUN_MODE = False # 24/7 streams: pooled annotation buffers, rotating output files (see longrun.py)
+STATS_REFRESH_MS = 1000 # Sidebar stats refresh rate (sampling itself happens in telemetry.py)
 
 # YOUR EXACT 11 CLASSES
 CLASS_NAMES = [
@@ -30,6 +34,67 @@ CLASS_NAMES = [
     "Trailer"             # 10
 ]
 
+class ModelLoader(QThread):
+    """
+    Imports torch/ultralytics, loads DEFAULT_MODEL and runs one warm-up
+    inference off the GUI thread, reporting progress as it goes.
+    Closing the window requests an interruption, which is honoured between
+    steps (a torch import in progress cannot be cancelled).
+    """
+    progress = pyqtSignal(int, str)
+    ready = pyqtSignal(object, object, str) # model, device, device_name
+    failed = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.timings = {} # startup phase -> seconds since PROCESS_START
+
+    def run(self):
+        try:
+            self.progress.emit(10, "Importing PyTorch...")
+            import torch
+            if self.isInterruptionRequested(): return
+
+            # --- SMART DEVICE LOADING ---
+            if torch.cuda.is_available():
+                device = 0
+                device_name = "GTX 1050 Ti"
+                print("✅ GPU DETECTED: Running on GTX 1050 Ti")
+            else:
+                device = 'cpu'
+                device_name = "CPU"
+                print("⚠️ GPU NOT FOUND")
+
+            self.progress.emit(30, "Importing Ultralytics...")
+            from ultralytics import YOLO
+            if self.isInterruptionRequested(): return
+
+            self.progress.emit(50, f"Loading Model: {DEFAULT_MODEL}...")
+            print(f"Loading Model: {DEFAULT_MODEL}...")
+            model = YOLO(DEFAULT_MODEL)
+
+            # Only move to GPU manually if it is a PyTorch model
+            # (ONNX models handle devices differently)
+            if DEFAULT_MODEL.endswith('.pt'):
+                self.progress.emit(70, "Moving model to device...")
+                model.to(device)
+            self.timings["model_loaded"] = time.perf_counter() - PROCESS_START
+            if self.isInterruptionRequested(): return
+
+            # Warm-up: the first call builds CUDA kernels / fuses layers,
+            # better to pay for it here than on the first video frame.
+            self.progress.emit(85, "Warming up...")
+            dummy = np.zeros((320, 320, 3), dtype=np.uint8)
+            model.predict(dummy, verbose=False, device=device, imgsz=320)
+            self.timings["first_inference"] = time.perf_counter() - PROCESS_START
+
+            print("Model Loaded!")
+            self.progress.emit(100, "Model Ready")
+            self.ready.emit(model, device, device_name)
+        except Exception as e:
+            print(f"❌ Model loading failed: {e}")
+            self.failed.emit(str(e))
+
 class TrafficDashboard(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -38,34 +103,15 @@ class TrafficDashboard(QMainWindow):
         self.setStyleSheet("background-color: #1e1e1e; color: white;")
 
         self.current_video_path = DEFAULT_VIDEO
-        self.gpu_handle = None 
-
-        # --- SMART DEVICE LOADING ---
-        if torch.cuda.is_available():
-            self.device = 0
-            device_name = "GTX 1050 Ti"
-            print("✅ GPU DETECTED: Running on GTX 1050 Ti")
-            try:
-                pynvml.nvmlInit()
-                self.gpu_handle = pynvml.nvmlDeviceGetHandleByIndex(0) 
-                print("✅ NVIDIA SENSORS CONNECTED")
-            except Exception as e:
-                print(f"⚠️ GPU Sensors Error: {e}")
-                self.gpu_handle = None
-        else:
-            self.device = 'cpu'
-            device_name = "CPU"
-            print("⚠️ GPU NOT FOUND")
+        self.model = None
+        self.device = None
+        self.first_window_shown = False
 
-        print(f"Loading Model: {DEFAULT_MODEL}...")
-        self.model = YOLO(DEFAULT_MODEL)
-        
-        # Only move to GPU manually if it is a PyTorch model
-        # (ONNX models handle devices differently)
-        if DEFAULT_MODEL.endswith('.pt'):
-            self.model.to(self.device)
-            
-        print("Model Loaded!")
+        # --- TELEMETRY (own thread, UI only reads the cached snapshot) ---
+        # GPU sensors are attached later, once the loader knows the device.
+        self.telemetry = TelemetrySampler()
+        self.telemetry.start()
+        self.gpu_hot = None # Last GPU warning state, so we only restyle when it flips
 
         # --- GUI LAYOUT ---
         self.central_widget = QWidget()
@@ -87,7 +133,7 @@ class TrafficDashboard(QMainWindow):
         self.add_stat_label("System Stats", header=True)
         self.fps_label = self.add_stat_label("FPS: 0")
         self.cpu_label = self.add_stat_label("CPU: 0%")
-        self.gpu_label = self.add_stat_label(f"GPU: {device_name}")
+        self.gpu_label = self.add_stat_label("GPU: detecting...")
 
         self.sidebar.addSpacing(20)
         self.add_stat_label("Vehicle Counts", header=True)
@@ -104,8 +150,9 @@ class TrafficDashboard(QMainWindow):
         self.select_btn.clicked.connect(self.select_video_file)
         self.sidebar.addWidget(self.select_btn)
 
-        self.start_btn = QPushButton("START MONITORING")
-        self.start_btn.setStyleSheet("background-color: #2ecc71; color: black; font-weight: bold; padding: 15px;")
+        self.start_btn = QPushButton("LOADING MODEL... 0%")
+        self.start_btn.setStyleSheet("background-color: #7f8c8d; color: black; font-weight: bold; padding: 15px;")
+        self.start_btn.setEnabled(False) # Enabled by on_model_ready
         self.start_btn.clicked.connect(self.toggle_feed)
         self.sidebar.addWidget(self.start_btn)
 
@@ -113,14 +160,65 @@ class TrafficDashboard(QMainWindow):
         self.frame_count = 0
         self.skip_interval = 2 # Process 1 frame, skip 2 (3x speedup)
         self.last_annotated_frame = None
+        self.buffers = BufferPool() # Reused frame / annotation / RGB buffers
         self.prev_frame_time = 0
+        self.smoothed_fps = 0.0
         
         self.timer = QTimer()
         self.timer.timeout.connect(self.update_frame)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.refresh_stats)
+        self.stats_timer.start(STATS_REFRESH_MS)
         self.cap = None
         self.out = None 
         self.running = False
 
+        # --- BACKGROUND MODEL LOADING ---
+        self.loader = ModelLoader()
+        self.loader.progress.connect(self.on_model_progress)
+        self.loader.ready.connect(self.on_model_ready)
+        self.loader.failed.connect(self.on_model_failed)
+        self.loader.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # singleShot(0) fires once the event loop has actually painted the window
+        if not self.first_window_shown:
+            self.first_window_shown = True
+            QTimer.singleShot(0, lambda: self.mark_startup("first_window"))
+
+    def mark_startup(self, phase, seconds=None):
+        if seconds is None:
+            seconds = time.perf_counter() - PROCESS_START
+        print(f"⏱️ Time to {phase.replace('_', ' ')}: {seconds:.2f}s")
+        self.telemetry.record_startup(phase, seconds)
+
+    def on_model_progress(self, percent, message):
+        self.start_btn.setText(f"LOADING MODEL... {percent}%")
+        if not self.running and self.current_video_path == DEFAULT_VIDEO:
+            self.video_label.setText(message)
+
+    def on_model_ready(self, model, device, device_name):
+        self.model = model
+        self.device = device
+        self.gpu_label.setText(f"GPU: {device_name}")
+        if device == 0:
+            self.telemetry.attach_gpu(0)
+        for phase, seconds in self.loader.timings.items():
+            self.mark_startup(phase, seconds)
+        self.mark_startup("model_ready")
+
+        self.start_btn.setEnabled(True)
+        self.start_btn.setText("START MONITORING")
+        self.start_btn.setStyleSheet("background-color: #2ecc71; color: black; font-weight: bold; padding: 15px;")
+        if self.current_video_path == DEFAULT_VIDEO:
+            self.video_label.setText("Click 'SELECT VIDEO' to choose a file...")
+
+    def on_model_failed(self, error):
+        self.start_btn.setText("MODEL FAILED TO LOAD")
+        self.start_btn.setStyleSheet("background-color: #e74c3c; color: white; font-weight: bold; padding: 15px;")
+        self.video_label.setText(f"Error: Could not load model.\n{error}")
+
     def add_stat_label(self, text, header=False):
         label = QLabel(text)
         font_size = "16px" if header else "13px"
@@ -139,48 +237,95 @@ class TrafficDashboard(QMainWindow):
 
     def toggle_feed(self):
         if not self.running:
-            self.cap = cv2.VideoCapture(self.current_video_path)
-            if not self.cap.isOpened():
+            cap = cv2.VideoCapture(self.current_video_path)
+            if not cap.isOpened():
                 self.video_label.setText("Error: Could not open video file.")
                 return
-
-            w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            # --- VIDEO WRITER FIX ---
-            # Use 'mp4v' codec for .mp4 files (Better compatibility/stability than XVID)
-            self.out = cv2.VideoWriter(OUTPUT_FILE, cv2.VideoWriter_fourcc(*'mp4v'), 25, (w, h))
-            
-            self.running = True
-            self.select_btn.setEnabled(False)
-            self.start_btn.setText("STOP & SAVE")
-            self.start_btn.setStyleSheet("background-color: #e74c3c; color: white; padding: 15px;")
+            self.start_feed(cap)
             self.timer.start(30)
         else:
             self.running = False
             self.timer.stop()
             self.cap.release()
-            if self.out: self.out.release()
+            saved_to = OUTPUT_FILE
+            if self.out:
+                self.out.release()
+                if isinstance(self.out, SegmentedVideoWriter):
+                    saved_to = self.out.describe()
             self.select_btn.setEnabled(True)
             self.start_btn.setText("START MONITORING")
             self.start_btn.setStyleSheet("background-color: #2ecc71; color: black; padding: 15px;")
-            self.video_label.setText(f"Processing Stopped.\nSaved to: {OUTPUT_FILE}")
+            self.video_label.setText(f"Processing Stopped.\nSaved to: {saved_to}")
+
+    def start_feed(self, cap):
+        # Split out of toggle_feed so soak_test.py can plug in a synthetic source
+        self.cap = cap
+        w = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.frame_shape = (h, w, 3)
+        self.last_annotated_frame = None
+        
+        # --- VIDEO WRITER FIX ---
+        # Use 'mp4v' codec for .mp4 files (Better compatibility/stability than XVID)
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        if LONG_RUN_MODE:
+            self.out = SegmentedVideoWriter(OUTPUT_FILE, fourcc, 25, (w, h))
+        else:
+            self.out = cv2.VideoWriter(OUTPUT_FILE, fourcc, 25, (w, h))
+        
+        self.running = True
+        self.select_btn.setEnabled(False)
+        self.start_btn.setText("STOP & SAVE")
+        self.start_btn.setStyleSheet("background-color: #e74c3c; color: white; padding: 15px;")
+
+    def closeEvent(self, event):
+        if self.loader.isRunning():
+            # Don't block the UI on a half-finished torch import: hide now,
+            # and close for real once the loader has stopped.
+            self.loader.requestInterruption()
+            self.loader.finished.connect(self.close)
+            self.hide()
+            event.ignore()
+            return
+        self.telemetry.stop()
+        super().closeEvent(event)
+
+    def refresh_stats(self):
+        snap = self.telemetry.snapshot()
+        self.fps_label.setText(f"FPS: {snap['fps']:.1f}")
+        self.cpu_label.setText(f"CPU: {snap['cpu_percent']}%")
+
+        if snap["gpu_util"] is not None:
+            mem_used_mb = snap["gpu_mem_used_bytes"] / 1024 / 1024
+            self.gpu_label.setText(f"GPU: {snap['gpu_util']}% | Mem: {int(mem_used_mb)}MB")
+
+            # setStyleSheet forces a re-polish, so only do it when the state changes
+            hot = snap["gpu_util"] > 80
+            if hot != self.gpu_hot:
+                self.gpu_hot = hot
+                color = "#e74c3c" if hot else "#ecf0f1"
+                self.gpu_label.setStyleSheet(f"font-size: 13px; color: {color}; font-weight: bold;")
 
     def update_frame(self):
         if not self.running: return
         
-        ret, frame = self.cap.read()
+        t0 = time.perf_counter()
+        # Decode into the same buffer every time instead of a fresh array
+        ret, frame = self.cap.read(self.buffers.get("frame", self.frame_shape))
+        self.telemetry.record_stage("read", time.perf_counter() - t0)
         if not ret:
             self.toggle_feed()
             return
 
-        self.frame_count += 1
+        # Wraps around instead of growing forever (only the phase matters)
+        self.frame_count = (self.frame_count + 1) % (self.skip_interval + 1)
         
         # --- LOGIC: SKIP FRAMES FOR SPEED ---
         # Only run heavy AI every (skip_interval + 1) frames
-        if self.frame_count % (self.skip_interval + 1) == 0:
+        if self.frame_count == 0:
             
             # Run AI on this frame (Reduced size 320 for speed)
+            t0 = time.perf_counter()
             results = self.model.track(
                 frame, 
                 persist=True, 
@@ -189,8 +334,15 @@ class TrafficDashboard(QMainWindow):
                 device=self.device, 
                 imgsz=320 
             )
+            self.telemetry.record_stage("inference", time.perf_counter() - t0)
             
-            self.last_annotated_frame = results[0].plot()
+            t0 = time.perf_counter()
+            if LONG_RUN_MODE:
+                annotated = self.buffers.get("annotated", frame.shape)
+                self.last_annotated_frame = annotate_into(annotated, frame, results[0], CLASS_NAMES)
+            else:
+                self.last_annotated_frame = results[0].plot()
+            self.telemetry.record_stage("annotate", time.perf_counter() - t0)
 
             counts = {name: 0 for name in CLASS_NAMES}
             if results[0].boxes.id is not None:
@@ -201,6 +353,7 @@ class TrafficDashboard(QMainWindow):
             
             for name, count in counts.items():
                 self.count_labels[name].setText(f"{name}: {count}")
+            self.telemetry.set_counts(counts)
 
             final_display = self.last_annotated_frame
             
@@ -214,7 +367,9 @@ class TrafficDashboard(QMainWindow):
         # --- WRITE EVERY FRAME ---
         # Important: Write to video every loop to avoid corruption
         if self.out:
+            t0 = time.perf_counter()
             self.out.write(final_display)
+            self.telemetry.record_stage("write", time.perf_counter() - t0)
 
         # --- STABLE FPS CALCULATION ---
         current_time = time.time()
@@ -227,38 +382,23 @@ class TrafficDashboard(QMainWindow):
             real_fps = 1.0 / time_diff
             
             # Smoothing (90% old, 10% new) to stop flickering
-            current_fps_text = self.fps_label.text().split(": ")[-1]
-            try:
-                old_fps = float(current_fps_text)
-            except ValueError:
-                old_fps = 0.0
-            
-            smoothed_fps = (old_fps * 0.9) + (real_fps * 0.1)
-            self.fps_label.setText(f"FPS: {smoothed_fps:.1f}")
+            self.smoothed_fps = (self.smoothed_fps * 0.9) + (real_fps * 0.1)
         
         self.prev_frame_time = current_time
-
-        self.cpu_label.setText(f"CPU: {psutil.cpu_percent()}%")
-        
-        if self.gpu_handle:
-            try:
-                util = pynvml.nvmlDeviceGetUtilizationRates(self.gpu_handle)
-                mem = pynvml.nvmlDeviceGetMemoryInfo(self.gpu_handle)
-                mem_used_mb = mem.used / 1024 / 1024
-                self.gpu_label.setText(f"GPU: {util.gpu}% | Mem: {int(mem_used_mb)}MB")
-                
-                if util.gpu > 80:
-                    self.gpu_label.setStyleSheet("font-size: 13px; color: #e74c3c; font-weight: bold;")
-                else:
-                    self.gpu_label.setStyleSheet("font-size: 13px; color: #ecf0f1; font-weight: bold;")
-            except: pass
+        self.telemetry.record_frame(self.smoothed_fps)
 
         # Display on GUI
+        t0 = time.perf_counter()
+        # BGR->RGB into a pooled buffer (rgbSwapped() allocated a new image every tick).
+        # QPixmap.fromImage copies the pixels, so the buffer is free again right after.
         h, w, ch = final_display.shape
         bytes_per_line = ch * w
-        qt_img = QImage(final_display.data, w, h, bytes_per_line, QImage.Format_RGB888).rgbSwapped()
+        rgb = self.buffers.get("rgb", final_display.shape)
+        cv2.cvtColor(final_display, cv2.COLOR_BGR2RGB, dst=rgb)
+        qt_img = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
         self.video_label.setPixmap(QPixmap.fromImage(qt_img).scaled(
             self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.telemetry.record_stage("display", time.perf_counter() - t0)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
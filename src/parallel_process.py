@@ -0,0 +1,326 @@
+import os
+import sys
+import time
+import shutil
+import multiprocessing as mp
+from collections import Counter, defaultdict
+import cv2
+import numpy as np
+from longrun import draw_tracks
+
+# --- CONFIGURATION ---
+INPUT_VIDEO = '../inference/Video/Inference -1.mp4'
+OUTPUT_FILE = '../output/processed_video_parallel.mp4'
+DEFAULT_MODEL = '../models/yolo11_small.pt'
+DEVICE = 'cpu'          # Offline mode is meant for many-core CPU boxes
+NUM_WORKERS = max(1, (os.cpu_count() or 1) // 4)  # ~4 cores per worker (torch threads)
+SEGMENT_OVERLAP_S = 3.0 # Each segment re-tracks this much of the previous one for ID matching
+MATCH_IOU = 0.5         # Same box in the overlap if IoU is above this
+MIN_MATCH_VOTES = 2     # Overlap frames two tracks must agree on before we call them the same vehicle
+SKIP_INTERVAL = 2       # Same as the dashboard: process 1 frame, skip 2
+TMP_DIR = '../output/_segments'
+
+# YOUR EXACT 11 CLASSES
+CLASS_NAMES = [
+    "Auto Rickshaw",      # 0
+    "Cycle Rickshaw",     # 1
+    "CNG / Tempo",        # 2
+    "Bus",                # 3
+    "Jeep / SUV",         # 4
+    "Microbus",           # 5
+    "Minibus",            # 6
+    "Motorcycle",         # 7
+    "Truck",              # 8
+    "Private Sedan Car",  # 9
+    "Trailer"             # 10
+]
+
+# Track log columns (one row per tracked box on an inference frame)
+COL_FRAME, COL_ID, COL_CLS, COL_BOX = 0, 1, 2, slice(3, 7)
+
+
+def is_inference_frame(frame_idx):
+    # Matches the dashboard's frame_count % (skip_interval + 1) == 0 (it counts from 1)
+    return (frame_idx + 1) % (SKIP_INTERVAL + 1) == 0
+
+
+def plan_segments(total_frames, num_segments, overlap_frames):
+    """
+    Splits [0, total_frames) into contiguous owned ranges. Each segment also
+    tracks `overlap_frames` before its start (warm-up) so the tracker has
+    history and its IDs can be matched against the previous segment.
+    """
+    num_segments = max(1, min(num_segments, total_frames // max(overlap_frames * 2, 1)))
+    bounds = np.linspace(0, total_frames, num_segments + 1).astype(int)
+
+    segments = []
+    for i in range(num_segments):
+        start, end = int(bounds[i]), int(bounds[i + 1])
+        segments.append({
+            "index": i,
+            "warmup_start": max(0, start - overlap_frames),
+            "start": start,
+            "end": end,
+        })
+    return segments
+
+
+def seek_to(cap, frame_idx):
+    """
+    Seeks and checks that the decoder really landed on frame_idx. Some codecs
+    snap to the previous keyframe, which would silently shift every box and
+    break overlap matching, so a miss aborts the run.
+    """
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    landed = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    if landed != frame_idx:
+        raise RuntimeError(f"Seek to frame {frame_idx} landed on {landed}. "
+                           f"Re-encode the video (e.g. all-intra or short GOP) before using parallel mode.")
+
+
+# --- PHASE 1: TRACKING (one process per segment) ---
+def track_segment(segment):
+    import torch
+    from ultralytics import YOLO
+
+    # Split the cores between workers instead of every process grabbing all of them
+    torch.set_num_threads(segment["threads"])
+    model = YOLO(DEFAULT_MODEL)
+
+    cap = cv2.VideoCapture(INPUT_VIDEO)
+    seek_to(cap, segment["warmup_start"])
+
+    rows = []
+    frame = None
+    for frame_idx in range(segment["warmup_start"], segment["end"]):
+        ret, frame = cap.read(frame)
+        if not ret:
+            break
+        if not is_inference_frame(frame_idx):
+            continue
+
+        results = model.track(frame, persist=True, verbose=False, conf=0.25, device=DEVICE, imgsz=320)
+        boxes = results[0].boxes
+        if boxes.id is None:
+            continue
+
+        ids = boxes.id.cpu().numpy()
+        classes = boxes.cls.cpu().numpy()
+        xyxy = boxes.xyxy.cpu().numpy()
+        for track_id, cls, box in zip(ids, classes, xyxy):
+            rows.append([frame_idx, track_id, cls, *box])
+    cap.release()
+
+    log_path = os.path.join(TMP_DIR, f"tracks_{segment['index']:04d}.npy")
+    np.save(log_path, np.array(rows, dtype=np.float32).reshape(-1, 7))
+    print(f"  [DONE] Segment {segment['index']}: frames {segment['start']}-{segment['end']}, {len(rows)} boxes")
+    return log_path
+
+
+# --- PHASE 2: STITCHING ---
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_overlap(prev_log, next_log, overlap_start, overlap_end):
+    """
+    Votes local track pairs (prev_id, next_id) that cover the same box on
+    the same frame inside the overlap, then assigns them greedily by votes.
+    """
+    prev_rows = prev_log[(prev_log[:, COL_FRAME] >= overlap_start) & (prev_log[:, COL_FRAME] < overlap_end)]
+    next_rows = next_log[(next_log[:, COL_FRAME] >= overlap_start) & (next_log[:, COL_FRAME] < overlap_end)]
+
+    by_frame = defaultdict(list)
+    for row in next_rows:
+        by_frame[int(row[COL_FRAME])].append(row)
+
+    votes = Counter()
+    for prev in prev_rows:
+        for nxt in by_frame.get(int(prev[COL_FRAME]), []):
+            if prev[COL_CLS] == nxt[COL_CLS] and box_iou(prev[COL_BOX], nxt[COL_BOX]) >= MATCH_IOU:
+                votes[(int(prev[COL_ID]), int(nxt[COL_ID]))] += 1
+
+    matches = {}
+    used_prev = set()
+    for (prev_id, next_id), count in votes.most_common():
+        if count < MIN_MATCH_VOTES:
+            break
+        if prev_id in used_prev or next_id in matches:
+            continue
+        matches[next_id] = prev_id
+        used_prev.add(prev_id)
+    return matches
+
+
+def stitch_tracks(segments, logs):
+    """
+    Returns one {local_id: global_id} map per segment and the class of every
+    global track that shows up in an owned (non warm-up) frame.
+    """
+    id_maps = []
+    next_global = 1
+    owned_classes = defaultdict(Counter) # global id -> class votes
+
+    for segment, log in zip(segments, logs):
+        matches = {}
+        if segment["index"] > 0:
+            matches = match_overlap(logs[segment["index"] - 1], log, segment["warmup_start"], segment["start"])
+
+        owned = log[log[:, COL_FRAME] >= segment["start"]]
+        id_map = {}
+        for local_id in np.unique(log[:, COL_ID]).astype(int).tolist():
+            if local_id in matches:
+                id_map[local_id] = id_maps[-1][matches[local_id]]
+            elif np.any(owned[:, COL_ID] == local_id):
+                id_map[local_id] = next_global
+                next_global += 1
+            # else: only seen during warm-up and not matched, the previous segment already owns it
+
+        for row in owned:
+            global_id = id_map.get(int(row[COL_ID]))
+            if global_id is not None:
+                owned_classes[global_id][int(row[COL_CLS])] += 1
+
+        id_maps.append(id_map)
+        print(f"  Segment {segment['index']}: {len(matches)} tracks carried over, {len(id_map) - len(matches)} new")
+
+    global_classes = {gid: votes.most_common(1)[0][0] for gid, votes in owned_classes.items()}
+    return id_maps, global_classes
+
+
+# --- PHASE 3: RENDERING (in order, straight into OUTPUT_FILE) ---
+def render_segment(cap, out, segment, log, id_map):
+    """
+    Draws one segment's stitched boxes onto frames read from `cap`, which is
+    already positioned at segment["start"] (segments are rendered back to
+    back from a single reader, so the video is encoded exactly once).
+    """
+    rows_by_frame = defaultdict(list)
+    for row in log:
+        rows_by_frame[int(row[COL_FRAME])].append(row)
+
+    # Boxes from the last inference frame stay on screen for the skipped ones
+    last_rows = []
+    warmup_frames = [f for f in rows_by_frame if f < segment["start"]]
+    if warmup_frames:
+        last_rows = rows_by_frame[max(warmup_frames)]
+
+    frame = None
+    for frame_idx in range(segment["start"], segment["end"]):
+        ret, frame = cap.read(frame)
+        if not ret:
+            break
+        if is_inference_frame(frame_idx):
+            last_rows = rows_by_frame.get(frame_idx, [])
+
+        rows = [r for r in last_rows if int(r[COL_ID]) in id_map]
+        if rows:
+            rows = np.array(rows)
+            ids = [id_map[int(i)] for i in rows[:, COL_ID]]
+            draw_tracks(frame, rows[:, COL_BOX], rows[:, COL_CLS], ids, CLASS_NAMES)
+        out.write(frame)
+
+
+def count_unique(global_classes):
+    return Counter(CLASS_NAMES[c] for c in global_classes.values() if 0 <= c < len(CLASS_NAMES))
+
+
+def process_video(num_workers=NUM_WORKERS, output_file=OUTPUT_FILE):
+    """
+    Tracks, stitches and renders INPUT_VIDEO. num_workers=1 is the sequential
+    reference: one segment, no overlap, tracked in this process, but counted
+    by the exact same stitching code. Returns the unique counts per class.
+    """
+    cap = cv2.VideoCapture(INPUT_VIDEO)
+    if not cap.isOpened():
+        print(f"❌ ERROR: Could not open {INPUT_VIDEO}")
+        return None
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    if total_frames <= 0:
+        # Some containers/streams don't report a length, and we can't split what we can't measure
+        print(f"❌ ERROR: {INPUT_VIDEO} does not report a frame count. Use the dashboard for this source.")
+        return None
+
+    overlap_frames = int(SEGMENT_OVERLAP_S * fps)
+    segments = plan_segments(total_frames, num_workers, overlap_frames)
+    for segment in segments:
+        # Passed explicitly: 'spawn' workers re-import this module and would not see overrides
+        segment["threads"] = max(1, (os.cpu_count() or 1) // len(segments))
+    os.makedirs(TMP_DIR, exist_ok=True)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    print(f"Splitting {total_frames} frames into {len(segments)} segments ({overlap_frames} frames overlap)...")
+
+    start_time = time.time()
+    try:
+        if len(segments) == 1:
+            log_paths = [track_segment(segments[0])]
+        else:
+            # 'spawn' so every worker gets a clean torch/CUDA state
+            with mp.get_context("spawn").Pool(len(segments)) as pool:
+                log_paths = pool.map(track_segment, segments)
+        logs = [np.load(p) for p in log_paths]
+
+        print("Stitching track IDs across segment boundaries...")
+        id_maps, global_classes = stitch_tracks(segments, logs)
+
+        print("Rendering...")
+        cap = cv2.VideoCapture(INPUT_VIDEO)
+        out = cv2.VideoWriter(output_file, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        try:
+            for segment, log, id_map in zip(segments, logs, id_maps):
+                render_segment(cap, out, segment, log, id_map)
+        finally:
+            cap.release()
+            out.release()
+    except RuntimeError as e:
+        print(f"❌ ERROR: {e}")
+        return None
+    finally:
+        # Any failure (missing model, cv2 error, bad seek...) still cleans up
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+    unique_counts = count_unique(global_classes)
+    print("-" * 30)
+    print(f"Unique vehicles ({len(global_classes)} total):")
+    for name in CLASS_NAMES:
+        print(f"  {name}: {unique_counts.get(name, 0)}")
+    print(f"SUCCESS! Processed in {time.time() - start_time:.1f}s -> {output_file}")
+    return unique_counts
+
+
+def compare_with_sequential():
+    """Runs the clip both ways and prints per-class unique counts side by side."""
+    root, ext = os.path.splitext(OUTPUT_FILE)
+    print("=== SEQUENTIAL (reference) ===")
+    sequential = process_video(num_workers=1, output_file=f"{root}_sequential{ext}")
+    print(f"=== PARALLEL ({NUM_WORKERS} workers) ===")
+    parallel = process_video()
+    if sequential is None or parallel is None:
+        return
+
+    print("-" * 30)
+    print(f"{'Class':<20}{'Sequential':>12}{'Parallel':>10}")
+    mismatches = 0
+    for name in CLASS_NAMES:
+        seq, par = sequential.get(name, 0), parallel.get(name, 0)
+        mismatches += seq != par
+        print(f"{name:<20}{seq:>12}{par:>10}{'  <-- differs' if seq != par else ''}")
+    print("✅ Counts match." if mismatches == 0 else f"⚠️ {mismatches} classes differ, check MATCH_IOU / SEGMENT_OVERLAP_S.")
+
+
+if __name__ == "__main__":
+    # python parallel_process.py [sequential|compare]
+    mode = sys.argv[1] if len(sys.argv) > 1 else "parallel"
+    if mode == "sequential":
+        process_video(num_workers=1)
+    elif mode == "compare":
+        compare_with_sequential()
+    else:
+        process_video()
@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+import psutil
+
+# Run the real dashboard without a screen (must be set before Qt starts)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+import main
+
+# --- CONFIGURATION ---
+SOAK_HOURS = 4.0          # Override from the command line: python soak_test.py 0.5
+SAMPLE_EVERY_S = 60       # RSS sample period
+WARMUP_S = 600            # Ignore the first 10 min (model/CUDA caches, tracker filling up)
+MAX_GROWTH_MB = 50        # Allowed RSS growth over the post-warmup baseline
+MAX_SLOPE_MB_PER_HOUR = 10 # Allowed trend, catches slow leaks that stay under MAX_GROWTH_MB
+SOAK_OUTPUT = '../output/soak_video.mp4'
+
+FRAME_W, FRAME_H = 1280, 720
+LOOP_FRAMES = 750         # Synthetic clip length before it repeats (30 s at 25 FPS)
+
+
+class SyntheticSource:
+    """
+    Looping fake camera with the same read()/get()/release() surface as
+    cv2.VideoCapture. A few coloured blocks drive across a grey road so the
+    tracker keeps creating and dropping tracks, forever.
+    """
+
+    def __init__(self, width=FRAME_W, height=FRAME_H, loop_frames=LOOP_FRAMES):
+        self.width = width
+        self.height = height
+        self.loop_frames = loop_frames
+        self.index = 0
+        self.background = np.full((height, width, 3), 90, dtype=np.uint8)
+        cv2.line(self.background, (0, height // 2), (width, height // 2), (255, 255, 255), 4)
+
+    def isOpened(self):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop == cv2.CAP_PROP_FPS:
+            return 25
+        return 0
+
+    def read(self, image=None):
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+        np.copyto(image, self.background)
+
+        t = self.index / self.loop_frames
+        for lane in range(4):
+            # Each lane has its own speed and size so vehicles enter/leave at different times
+            x = int(((t * (lane + 1)) % 1.0) * (self.width + 300)) - 300
+            y = 80 + lane * (self.height - 200) // 3
+            w, h = 160 + lane * 40, 90 + lane * 15
+            cv2.rectangle(image, (x, y), (x + w, y + h), (40 + lane * 50, 60, 200 - lane * 40), -1)
+
+        self.index = (self.index + 1) % self.loop_frames
+        return True, image
+
+    def release(self):
+        pass
+
+
+def run_soak(hours):
+    print(f"--- SOAK TEST: {hours:.2f} h, long-run mode ON ---")
+    main.LONG_RUN_MODE = True
+    main.OUTPUT_FILE = SOAK_OUTPUT
+    os.makedirs(os.path.dirname(SOAK_OUTPUT), exist_ok=True)
+
+    app = QApplication(sys.argv)
+    window = main.TrafficDashboard()
+    window.show()
+
+    # Wait for the background loader, then let its 'ready' signal reach the window
+    window.loader.wait()
+    app.processEvents()
+    if window.model is None:
+        print("❌ Model did not load, cannot soak.")
+        return 1
+
+    window.start_feed(SyntheticSource())
+    process = psutil.Process(os.getpid())
+
+    start = time.time()
+    end = start + hours * 3600
+    next_sample = start + min(WARMUP_S, hours * 3600 / 4)
+    samples = [] # (hours since start, rss MB)
+    frames = 0
+
+    while time.time() < end:
+        window.update_frame()
+        app.processEvents()
+        frames += 1
+
+        now = time.time()
+        if now >= next_sample:
+            rss_mb = process.memory_info().rss / 1024 / 1024
+            samples.append(((now - start) / 3600, rss_mb))
+            print(f"  [{(now - start) / 60:7.1f} min] frames={frames} RSS={rss_mb:.1f} MB")
+            next_sample = now + SAMPLE_EVERY_S
+
+    window.toggle_feed()
+    window.close()
+
+    if len(samples) < 3:
+        print("❌ Not enough samples, run the soak for longer.")
+        return 1
+
+    # --- VERDICT ---
+    hours_axis = np.array([s[0] for s in samples])
+    rss_axis = np.array([s[1] for s in samples])
+    baseline = rss_axis[0]
+    growth = rss_axis[-3:].mean() - baseline # Average the tail so one GC spike does not fail the run
+    slope = np.polyfit(hours_axis, rss_axis, 1)[0]
+
+    print("-" * 30)
+    print(f"Baseline RSS : {baseline:.1f} MB")
+    print(f"Final RSS    : {rss_axis[-1]:.1f} MB (peak {rss_axis.max():.1f} MB)")
+    print(f"Growth       : {growth:+.1f} MB (limit {MAX_GROWTH_MB} MB)")
+    print(f"Trend        : {slope:+.2f} MB/h (limit {MAX_SLOPE_MB_PER_HOUR} MB/h)")
+
+    if growth > MAX_GROWTH_MB or slope > MAX_SLOPE_MB_PER_HOUR:
+        print("❌ FAIL: memory is creeping.")
+        return 1
+    print("✅ PASS: memory stayed flat.")
+    return 0
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else SOAK_HOURS
+    sys.exit(run_soak(hours))
@@ -0,0 +1,276 @@
+import os
+import time
+import socket
+import threading
+import psutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- CONFIGURATION ---
+SAMPLE_INTERVAL = 1.0   # Seconds between CPU/GPU samples (runs on its own thread)
+# Per-instance settings come from the environment, so several headless monitors
+# on one host don't share a file or fight over a port:
+#   TRAFFIC_INSTANCE=cam3 TRAFFIC_METRICS_PORT=9113 python main.py
+INSTANCE = os.environ.get("TRAFFIC_INSTANCE") or f"{socket.gethostname()}-{os.getpid()}"
+METRICS_FILE = os.environ.get("TRAFFIC_METRICS_FILE", f'../output/metrics_{INSTANCE}.prom')  # node_exporter textfile style
+METRICS_PORT = int(os.environ.get("TRAFFIC_METRICS_PORT", "0"))  # e.g. 9108 serves http://<host>:<port>/metrics (0 = off)
+
+
+class TelemetrySampler(threading.Thread):
+    """
+    Samples CPU / RAM / GPU usage in the background and keeps a cached snapshot.
+    The GUI (or a headless runner) only ever reads the snapshot, so no sensor
+    call ever happens on the frame loop.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, metrics_file=METRICS_FILE, port=METRICS_PORT, gpu_index=None, instance=INSTANCE):
+        super().__init__(name="TelemetrySampler", daemon=True)
+        self.interval = interval
+        self.instance = instance
+        self.metrics_file = metrics_file
+        self.port = port
+        self.gpu_index = gpu_index
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._process = psutil.Process(os.getpid())
+        self._gpu_handle = None
+        self._pynvml = None
+        self._nvml_initialized = False # Separate from the handle: a lost sensor still needs nvmlShutdown()
+        self._server = None
+        self._gpu_pending = gpu_index is not None
+
+        # Values pushed by the frame loop (cheap: just a lock + assignment)
+        self._fps = 0.0
+        self._frames = 0
+        self._stages = {}   # stage name -> [count, total_seconds, last_seconds]
+        self._counts = {}   # class name -> vehicles in the last processed frame
+        self._startup = {}  # phase name -> seconds since process start
+
+        # Values produced by this thread
+        self._snapshot = {
+            "cpu_percent": 0.0,
+            "rss_bytes": 0,
+            "gpu_util": None,
+            "gpu_mem_used_bytes": None,
+            "timestamp": 0.0,
+        }
+
+    # --- FRAME LOOP API (called from the GUI thread) ---
+    def record_frame(self, fps):
+        with self._lock:
+            self._frames += 1
+            self._fps = fps
+
+    def record_stage(self, name, seconds):
+        with self._lock:
+            stage = self._stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] = seconds
+
+    def set_counts(self, counts):
+        with self._lock:
+            self._counts = dict(counts)
+
+    def record_startup(self, phase, seconds):
+        with self._lock:
+            self._startup[phase] = seconds
+
+    def attach_gpu(self, gpu_index):
+        # The device is often only known after the (lazy) torch import,
+        # so the sampler thread picks this up on its next tick.
+        with self._lock:
+            self.gpu_index = gpu_index
+            self._gpu_pending = True
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self._snapshot)
+            snap["fps"] = self._fps
+            snap["frames"] = self._frames
+        return snap
+
+    # --- SAMPLER THREAD ---
+    def run(self):
+        self._init_gpu()
+        self._start_server()
+
+        # First call primes psutil's counter, the next one returns a real value
+        psutil.cpu_percent(interval=None)
+
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+            self._write_file()
+
+        self._shutdown()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _init_gpu(self):
+        with self._lock:
+            if not self._gpu_pending:
+                return
+            self._gpu_pending = False
+        try:
+            import pynvml
+            pynvml.nvmlInit()
+            self._pynvml = pynvml
+            self._nvml_initialized = True
+            self._gpu_handle = pynvml.nvmlDeviceGetHandleByIndex(self.gpu_index)
+            print("✅ NVIDIA SENSORS CONNECTED")
+        except Exception as e:
+            print(f"⚠️ GPU Sensors Error: {e}")
+            self._gpu_handle = None
+
+    def _sample(self):
+        self._init_gpu()
+        cpu = psutil.cpu_percent(interval=None)
+        rss = self._process.memory_info().rss
+        gpu_util, gpu_mem = None, None
+
+        if self._gpu_handle is not None:
+            try:
+                util = self._pynvml.nvmlDeviceGetUtilizationRates(self._gpu_handle)
+                mem = self._pynvml.nvmlDeviceGetMemoryInfo(self._gpu_handle)
+                gpu_util, gpu_mem = util.gpu, mem.used
+            except self._pynvml.NVMLError as e:
+                # Sensor went away (driver reset, etc). Report once and stop polling it.
+                print(f"⚠️ GPU Sensors Lost: {e}")
+                self._gpu_handle = None
+
+        with self._lock:
+            self._snapshot = {
+                "cpu_percent": cpu,
+                "rss_bytes": rss,
+                "gpu_util": gpu_util,
+                "gpu_mem_used_bytes": gpu_mem,
+                "timestamp": time.time(),
+            }
+
+    # --- PROMETHEUS EXPORT ---
+    def render(self):
+        with self._lock:
+            snap = dict(self._snapshot)
+            fps, frames = self._fps, self._frames
+            stages = {name: list(values) for name, values in self._stages.items()}
+            counts = dict(self._counts)
+            startup = dict(self._startup)
+
+        lines = [
+            "# HELP traffic_fps Smoothed display frames per second.",
+            "# TYPE traffic_fps gauge",
+            f"traffic_fps {fps:.3f}",
+            "# HELP traffic_frames_total Frames read from the video source.",
+            "# TYPE traffic_frames_total counter",
+            f"traffic_frames_total {frames}",
+            "# HELP traffic_stage_latency_seconds Time spent per pipeline stage.",
+            "# TYPE traffic_stage_latency_seconds summary",
+        ]
+        for name, (count, total, _) in sorted(stages.items()):
+            lines.append(f'traffic_stage_latency_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'traffic_stage_latency_seconds_count{{stage="{name}"}} {count}')
+
+        lines += [
+            "# HELP traffic_stage_last_latency_seconds Latency of the most recent call per stage.",
+            "# TYPE traffic_stage_last_latency_seconds gauge",
+        ]
+        for name, (_, _, last) in sorted(stages.items()):
+            lines.append(f'traffic_stage_last_latency_seconds{{stage="{name}"}} {last:.6f}')
+
+        lines += [
+            "# HELP traffic_vehicles Tracked vehicles per class in the last processed frame.",
+            "# TYPE traffic_vehicles gauge",
+        ]
+        for name, count in counts.items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'traffic_vehicles{{class="{label}"}} {count}')
+
+        lines += [
+            "# HELP traffic_startup_seconds Seconds from process start to each startup milestone.",
+            "# TYPE traffic_startup_seconds gauge",
+        ]
+        for phase, seconds in startup.items():
+            lines.append(f'traffic_startup_seconds{{phase="{phase}"}} {seconds:.3f}')
+
+        lines += [
+            "# HELP traffic_cpu_percent System-wide CPU utilisation.",
+            "# TYPE traffic_cpu_percent gauge",
+            f"traffic_cpu_percent {snap['cpu_percent']:.1f}",
+            "# HELP traffic_process_rss_bytes Resident memory of this process.",
+            "# TYPE traffic_process_rss_bytes gauge",
+            f"traffic_process_rss_bytes {snap['rss_bytes']}",
+        ]
+        if snap["gpu_util"] is not None:
+            lines += [
+                "# HELP traffic_gpu_utilization_percent GPU core utilisation.",
+                "# TYPE traffic_gpu_utilization_percent gauge",
+                f"traffic_gpu_utilization_percent {snap['gpu_util']}",
+                "# HELP traffic_gpu_memory_used_bytes GPU memory in use.",
+                "# TYPE traffic_gpu_memory_used_bytes gauge",
+                f"traffic_gpu_memory_used_bytes {snap['gpu_mem_used_bytes']}",
+            ]
+        return "\n".join(self._label_instance(line) for line in lines) + "\n"
+
+    def _label_instance(self, line):
+        # Every sample carries instance="..." so many monitors can share one scrape target
+        if line.startswith("#"):
+            return line
+        name, value = line.rsplit(" ", 1)
+        label = 'instance="' + self.instance.replace("\\", "\\\\").replace('"', '\\"') + '"'
+        if name.endswith("}"):
+            return f"{name[:name.index('{') + 1]}{label},{name[name.index('{') + 1:]} {value}"
+        return f"{name}{{{label}}} {value}"
+
+    def _write_file(self):
+        if not self.metrics_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.metrics_file) or ".", exist_ok=True)
+            # Write + rename so a scraper never reads a half-written file
+            tmp_path = self.metrics_file + ".tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp_path, self.metrics_file)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics file: {e}")
+            self.metrics_file = None
+
+    def _start_server(self):
+        if not self.port:
+            return
+        sampler = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sampler.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass # Keep the console clean, scrapers hit this every few seconds
+
+        try:
+            self._server = ThreadingHTTPServer(("0.0.0.0", self.port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint disabled: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True).start()
+        print(f"✅ Metrics at http://localhost:{self.port}/metrics")
+
+    def _shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._nvml_initialized:
+            self._nvml_initialized = False
+            try:
+                self._pynvml.nvmlShutdown()
+            except self._pynvml.NVMLError:
+                pass